@@ -1,12 +1,17 @@
-from flask import Flask, request, jsonify, send_file
-from flask_cors import CORS
+import json
+import asyncio
+from quart import Quart, request, websocket, jsonify, send_file, make_response
+from quart_cors import cors
 import os
-import time
-import threading
 from music_service import MusicGenerationService
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend
+# Frontend assets (HTML, CSS, JS) are served straight from static/ at the
+# site root; in production let the reverse proxy serve that directory
+app = Quart(__name__, static_folder='static', static_url_path='')
+# Asset names carry no content hash, so make browsers revalidate them
+# (cheap 304s via ETag) instead of keeping stale JS after a deploy
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+app = cors(app, allow_origin='*')  # Enable CORS for frontend
 
 # Initialize music generation service
 music_service = MusicGenerationService()
@@ -14,43 +19,57 @@ music_service = MusicGenerationService()
 # Store for active generation tasks
 generation_tasks = {}
 
+# Size of each binary frame when streaming audio over WebSocket
+AUDIO_CHUNK_SIZE = 16 * 1024
+
+# Cache lifetime (seconds) for generated audio, which is immutable per task
+AUDIO_MAX_AGE = 365 * 24 * 60 * 60
+
+def validate_description(description):
+    """
+    Validate a music description
+    
+    Returns:
+        str: Error message, or None if the description is valid
+    """
+    if not description:
+        return 'Description is required'
+    
+    if len(description) < 10:
+        return f'Description must be at least 10 characters (got {len(description)})'
+    
+    if len(description) > 2000:
+        return 'Description is too long (maximum 2000 characters)'
+    
+    return None
+
+def generation_timeout(description):
+    """
+    Seconds to wait for a generation, scaled by description length
+    
+    Longer descriptions are given more time, bounded to 10-60 seconds.
+    """
+    return min(60, max(10, len(description) / 50 * 3))
+
+@app.before_serving
+async def start_background_tasks():
+    """Warm up generation and start periodic cleanup of old tasks"""
+    await music_service.load_waveforms()
+    await music_service.warmup()
+    music_service.start_cleanup()
+
+@app.after_serving
+async def stop_background_tasks():
+    """Stop background work when the server shuts down"""
+    music_service.shutdown()
+
 @app.route('/')
-def index():
+async def index():
     """Serve the main HTML page"""
-    return send_file('index.html')
-
-@app.route('/styles.css')
-def styles():
-    """Serve CSS file"""
-    return send_file('styles.css')
-
-@app.route('/app.js')
-def app_js():
-    """Serve JavaScript file"""
-    return send_file('app.js')
-
-@app.route('/music-generator-interface.js')
-def music_generator_interface():
-    """Serve music generator interface"""
-    return send_file('music-generator-interface.js')
-
-@app.route('/tone-music-generator.js')
-def tone_music_generator():
-    """Serve Tone.js music generator"""
-    return send_file('tone-music-generator.js')
-
-@app.route('/api-music-generator.js')
-def api_music_generator():
-    """Serve API music generator"""
-    return send_file('api-music-generator.js')
-
-@app.route('/music-generator-manager.js')
-def music_generator_manager():
-    """Serve music generator manager"""
-    return send_file('music-generator-manager.js')
+    return await app.send_static_file('index.html')
 
 @app.route('/api/generate-music', methods=['POST'])
-def generate_music():
+async def generate_music():
     """
     Generate music based on text description
     
@@ -66,7 +85,7 @@ def generate_music():
     }
     """
     try:
-        data = request.get_json()
+        data = await request.get_json()
         
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
@@ -74,45 +93,33 @@ def generate_music():
         description = data.get('description', '').strip()
         
         # Validate description
-        if not description:
-            return jsonify({'error': 'Description is required'}), 400
-        
-        if len(description) < 10:
-            return jsonify({
-                'error': f'Description must be at least 10 characters (got {len(description)})'
-            }), 400
+        error = validate_description(description)
+        if error:
+            return jsonify({'error': error}), 400
         
-        if len(description) > 2000:
-            return jsonify({
-                'error': 'Description is too long (maximum 2000 characters)'
-            }), 400
-        
-        # Generate music (this will be async in a real implementation)
-        # For now, we'll simulate generation
+        # Start generation as a background task on the event loop
         task_id = music_service.start_generation(description)
         
-        # Wait for generation to complete (in production, this would be async)
-        # For demo purposes, we'll wait up to 30 seconds
-        max_wait = 30
-        wait_interval = 0.5
-        waited = 0
+        # Wait for generation to complete without holding a worker thread
+        max_wait = generation_timeout(description)
         
-        while waited < max_wait:
+        if await music_service.wait_for(task_id, timeout=max_wait):
             status = music_service.get_status(task_id)
             if status['status'] == 'completed':
                 return jsonify({
                     'audio_url': f'/api/audio/{task_id}',
                     'task_id': task_id
                 })
-            elif status['status'] == 'error':
-                return jsonify({
-                    'error': status.get('error', 'Music generation failed')
-                }), 500
             
-            time.sleep(wait_interval)
-            waited += wait_interval
+            return jsonify({
+                'error': status.get('error') or 'Music generation failed'
+            }), 500
         
         # Timeout
+        app.logger.warning(
+            f'Music generation timed out after {max_wait:.0f}s (task {task_id}); '
+            f'consider raising MUSIC_POOL_SIZE'
+        )
         return jsonify({
             'error': 'Music generation timed out. Please try again.'
         }), 504
@@ -124,7 +131,7 @@ def generate_music():
         }), 500
 
 @app.route('/api/audio/<task_id>')
-def get_audio(task_id):
+async def get_audio(task_id):
     """
     Serve the generated audio file
     
@@ -137,18 +144,25 @@ def get_audio(task_id):
         if not audio_path or not os.path.exists(audio_path):
             return jsonify({'error': 'Audio file not found'}), 404
         
-        return send_file(
+        # Audio never changes once generated for a task, so let clients
+        # cache it and answer ETag revalidations / Range seeks cheaply
+        response = await send_file(
             audio_path,
-            mimetype='audio/mpeg',
-            as_attachment=False
+            mimetype='audio/wav',
+            as_attachment=False,
+            add_etags=True,
+            cache_timeout=AUDIO_MAX_AGE,
+            conditional=True
         )
+        response.cache_control.immutable = True
+        return response
         
     except Exception as e:
         app.logger.error(f'Error serving audio: {str(e)}')
         return jsonify({'error': 'Error serving audio file'}), 500
 
 @app.route('/api/status/<task_id>')
-def get_status(task_id):
+async def get_status(task_id):
     """
     Get the status of a music generation task
     
@@ -158,8 +172,15 @@ def get_status(task_id):
         "progress": 0-100,
         "error": "error message if status is error"
     }
+    
+    Clients that send "Accept: text/event-stream" (e.g. EventSource)
+    instead get a Server-Sent Events stream with one such object per
+    progress update, ending once the task completes or fails.
     """
     try:
+        if request.accept_mimetypes.best == 'text/event-stream':
+            return await stream_status(task_id)
+        
         status = music_service.get_status(task_id)
         return jsonify(status)
     except Exception as e:
@@ -168,9 +189,113 @@ def get_status(task_id):
             'error': str(e)
         }), 500
 
+async def stream_status(task_id):
+    """Build a Server-Sent Events response that follows a task's status"""
+    updates = music_service.subscribe(task_id)
+    
+    # A non-200 answer stops EventSource from reconnecting forever
+    if updates is None:
+        return jsonify(music_service.get_status(task_id)), 404
+    
+    async def events():
+        try:
+            while True:
+                status = await updates.get()
+                yield f'data: {json.dumps(status)}\n\n'.encode()
+                if status['status'] in ('completed', 'error'):
+                    break
+        finally:
+            music_service.unsubscribe(task_id, updates)
+    
+    response = await make_response(events(), {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache'
+    })
+    # Generation can outlast Quart's default response timeout
+    response.timeout = None
+    return response
+
+@app.websocket('/ws/generate')
+async def generate_music_ws():
+    """
+    Generate music and stream progress and audio over a WebSocket
+    
+    Expects a single JSON message:
+    {
+        "description": "upbeat jazz with piano and drums"
+    }
+    
+    Sends a JSON status message for every progress update:
+    {
+        "task_id": "<task_id>",
+        "status": "processing|completed|error",
+        "progress": 0-100,
+        "error": "error message if status is error"
+    }
+    
+    The "completed" message also carries "audio_url" and "audio_bytes";
+    it is followed by the WAV file in binary frames of AUDIO_CHUNK_SIZE.
+    """
+    try:
+        data = await websocket.receive_json()
+        description = (data or {}).get('description', '').strip()
+        
+        error = validate_description(description)
+        if error:
+            await websocket.send_json({'status': 'error', 'error': error})
+            return
+        
+        task_id = music_service.start_generation(description)
+        updates = music_service.subscribe(task_id)
+        
+        try:
+            while True:
+                status = await updates.get()
+                if status['status'] in ('completed', 'error'):
+                    break
+                await websocket.send_json({'task_id': task_id, **status})
+        finally:
+            music_service.unsubscribe(task_id, updates)
+        
+        if status['status'] == 'error':
+            await websocket.send_json({'task_id': task_id, **status})
+            return
+        
+        audio_path = music_service.get_audio_path(task_id)
+        # Blocking file read goes on the service's bounded pool
+        audio = await asyncio.get_running_loop().run_in_executor(
+            music_service.pool, _read_file, audio_path
+        )
+        
+        await websocket.send_json({
+            'task_id': task_id,
+            **status,
+            'audio_url': f'/api/audio/{task_id}',
+            'audio_bytes': len(audio)
+        })
+        
+        view = memoryview(audio)
+        for offset in range(0, len(view), AUDIO_CHUNK_SIZE):
+            await websocket.send(view[offset:offset + AUDIO_CHUNK_SIZE].tobytes())
+        
+    except asyncio.CancelledError:
+        # Client disconnected
+        raise
+    except Exception as e:
+        app.logger.error(f'Error streaming music: {str(e)}')
+        await websocket.send_json({
+            'status': 'error',
+            'error': 'An unexpected error occurred. Please try again.'
+        })
+
+def _read_file(path):
+    """Read a whole file into memory (blocking; run it in an executor)"""
+    with open(path, 'rb') as f:
+        return f.read()
+
 if __name__ == '__main__':
     # Create necessary directories
     os.makedirs('generated_audio', exist_ok=True)
     
-    # Run Flask app
+    # Run Quart app (use `hypercorn app:app` in production)
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -1,8 +1,133 @@
 import os
-import time
-import uuid
+import re
+import sys
+import math
+import secrets
+import shutil
+import struct
+import asyncio
 import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # Fall back to the lookup-table synth below
+    np = None
+
+# Audio parameters for the mock generator
+SAMPLE_RATE = 44100
+DURATION = 5.0  # 5 seconds
+FREQUENCIES = (220.0, 440.0, 880.0)  # A3, A4, A5
+NUM_SAMPLES = int(SAMPLE_RATE * DURATION)
+
+# Description keywords that pick a lower or higher tone
+_LOW_RE = re.compile(r'\b(?:low|bass)\b', re.IGNORECASE)
+_HIGH_RE = re.compile(r'\b(?:high|treble)\b', re.IGNORECASE)
+
+# Every mock file is mono 16-bit PCM of the same length, so the 44-byte
+# RIFF/WAVE header is the same for all of them
+_WAV_DATA_SIZE = NUM_SAMPLES * 2
+_WAV_HEADER = struct.pack(
+    '<4sI4s4sIHHIIHH4sI',
+    b'RIFF', 36 + _WAV_DATA_SIZE, b'WAVE',
+    b'fmt ', 16, 1, 1, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16,
+    b'data', _WAV_DATA_SIZE
+)
+
+# Maximum number of distinct generated WAV files to keep for reuse
+AUDIO_CACHE_SIZE = 32
+
+# Task retention: above TASK_PRESSURE_LOW tracked tasks the TTL is halved;
+# above MAX_TASKS the oldest finished tasks are evicted immediately
+MAX_TASKS = 1000
+TASK_PRESSURE_LOW = MAX_TASKS // 2
+CLEANUP_INTERVAL = 600  # seconds between periodic cleanups
+
+@dataclass
+class Task:
+    """State of a single music generation task."""
+    description: str
+    created_at: datetime = field(default_factory=datetime.now)
+    status: str = 'pending'
+    progress: int = 0
+    audio_path: Optional[str] = None
+    error: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    worker: Optional[asyncio.Task] = None
+    listeners: list = field(default_factory=list)
+
+def _synthesize(frequency):
+    """
+    Synthesize a tone with harmonics and a fade in/out envelope.
+    
+    Args:
+        frequency: Fundamental frequency in Hz
+        
+    Returns:
+        numpy.ndarray: Mono 16-bit little-endian samples (an array.array
+        from _synthesize_table() if NumPy is not installed)
+    """
+    if np is None:
+        return _synthesize_table(frequency)
+    
+    # Generate audio data (vectorized over all samples at once)
+    t = np.arange(NUM_SAMPLES, dtype=np.float32) / SAMPLE_RATE
+    w = 2 * np.pi * frequency * t
+    # Add some harmonics for richer sound
+    value = 0.3 * np.sin(w) + 0.2 * np.sin(2 * w) + 0.1 * np.sin(3 * w)
+    # Apply envelope (fade in/out)
+    envelope = np.clip(np.minimum(t / 0.1, (DURATION - t) / 0.1), 0, 1)
+    # Convert to 16-bit little-endian integers
+    return (value * envelope * 32767).astype('<i2')
+
+def _synthesize_pcm(frequency):
+    """Synthesize a tone as raw PCM bytes, ready to write after the header."""
+    return _synthesize(frequency).tobytes()
+
+# One period of a sine wave, for synthesis without NumPy
+_SIN_TABLE_SIZE = 4096
+_SIN_TABLE = array('d', [
+    math.sin(2 * math.pi * i / _SIN_TABLE_SIZE) for i in range(_SIN_TABLE_SIZE)
+])
+
+def _synthesize_table(frequency):
+    """
+    Pure-Python version of _synthesize() used when NumPy is unavailable.
+    
+    Reads each harmonic from a sine lookup table using a phase accumulator,
+    so the inner loop does no transcendental math.
+    
+    Returns:
+        array.array: Mono 16-bit little-endian samples
+    """
+    table = _SIN_TABLE
+    mask = _SIN_TABLE_SIZE - 1
+    step = frequency * _SIN_TABLE_SIZE / SAMPLE_RATE
+    fade_samples = int(0.1 * SAMPLE_RATE)
+    
+    # Flat int16 buffer, filled in place (no per-sample int objects kept)
+    samples = array('h', bytes(NUM_SAMPLES * 2))
+    phase = 0.0
+    for i in range(NUM_SAMPLES):
+        # Fundamental plus 2nd and 3rd harmonics
+        value = (
+            table[int(phase) & mask] * 0.3 +
+            table[int(phase * 2) & mask] * 0.2 +
+            table[int(phase * 3) & mask] * 0.1
+        )
+        phase += step
+        # Apply envelope (fade in/out)
+        envelope = min(i, NUM_SAMPLES - i, fade_samples) / fade_samples
+        samples[i] = int(value * envelope * 32767)
+    
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
 
 class MusicGenerationService:
     """
@@ -13,76 +138,121 @@ class MusicGenerationService:
     generation API or model.
     """
     
-    def __init__(self):
+    def __init__(self, pool_size=None):
+        # task_id -> Task; mutations and iteration are guarded by _lock
         self.tasks = {}
+        self._lock = threading.Lock()
         self.audio_dir = 'generated_audio'
         os.makedirs(self.audio_dir, exist_ok=True)
+        
+        # Bounded pool for synthesis and file I/O, sized by MUSIC_POOL_SIZE
+        # (defaults to the number of cores)
+        if pool_size is None:
+            pool_size = int(os.environ.get('MUSIC_POOL_SIZE', 0)) or os.cpu_count()
+        self.pool = ThreadPoolExecutor(
+            max_workers=pool_size,
+            thread_name_prefix='music-io'
+        )
+        
+        # LRU of synthesis parameters -> an already-written WAV file.
+        # Accessed from pool threads, so guarded by a lock.
+        self.audio_cache = OrderedDict()
+        self._audio_cache_lock = threading.Lock()
+        
+        self._cleanup_task = None
+        
+        # There are only a few possible tones, so each is synthesized once
+        # (see load_waveforms) and kept as raw PCM bytes
+        self._waveforms = {}
     
     def start_generation(self, description):
         """
         Start music generation for a given description.
         
+        Must be called from a running event loop; generation runs as a
+        background asyncio task.
+        
         Args:
             description: Text description of desired music
             
         Returns:
             task_id: Unique identifier for this generation task
         """
-        task_id = str(uuid.uuid4())
+        # 64 random bits as 16 hex chars: short in URLs and file names, and
+        # the birthday bound (~n^2 / 2^65) stays below one in a billion
+        # until roughly 190,000 tasks exist at once (MAX_TASKS is far lower)
+        task_id = secrets.token_hex(8)
         
         # Initialize task status
-        self.tasks[task_id] = {
-            'status': 'pending',
-            'description': description,
-            'progress': 0,
-            'created_at': datetime.now(),
-            'audio_path': None,
-            'error': None
-        }
+        task = Task(description=description)
+        with self._lock:
+            self.tasks[task_id] = task
+            over_limit = len(self.tasks) > MAX_TASKS
         
-        # Start generation in background thread
-        thread = threading.Thread(
-            target=self._generate_music,
-            args=(task_id, description)
+        # Past the hard limit, evict the oldest finished tasks right away
+        # rather than waiting for the next periodic cleanup
+        if over_limit:
+            self.pool.submit(self._enforce_task_limit)
+        
+        # Start generation as a background task on the running event loop
+        task.worker = asyncio.create_task(
+            self._generate_music(task_id, task)
         )
-        thread.daemon = True
-        thread.start()
         
         return task_id
     
-    def _generate_music(self, task_id, description):
+    async def _generate_music(self, task_id, task):
         """
         Internal method to generate music.
-        This simulates the generation process.
+        
+        Progress is only reported at real milestones; a real generator
+        should report it from its own callback (e.g. per diffusion step).
         """
+        description = task.description
+        
         try:
             # Update status to processing
-            self.tasks[task_id]['status'] = 'processing'
-            self.tasks[task_id]['progress'] = 10
-            
-            # Simulate processing time (2-8 seconds based on description length)
-            # In production, this would call an actual music generation API
-            processing_time = min(8, max(2, len(description) / 50))
-            
-            steps = int(processing_time * 2)  # Update progress every 0.5 seconds
-            step_time = processing_time / steps
-            
-            for i in range(steps):
-                time.sleep(step_time)
-                progress = 10 + int((i + 1) / steps * 80)
-                self.tasks[task_id]['progress'] = progress
+            task.status = 'processing'
+            self._set_progress(task, 50)
             
             # Generate audio file (mock - creates a simple audio file)
-            audio_path = self._create_mock_audio(task_id, description)
+            # Synthesis is CPU-bound, so run it on the bounded pool
+            audio_path = await asyncio.get_running_loop().run_in_executor(
+                self.pool, self._create_mock_audio, task_id, description
+            )
             
             # Update task with completion
-            self.tasks[task_id]['status'] = 'completed'
-            self.tasks[task_id]['progress'] = 100
-            self.tasks[task_id]['audio_path'] = audio_path
+            task.audio_path = audio_path
+            task.progress = 100
+            task.status = 'completed'
             
         except Exception as e:
-            self.tasks[task_id]['status'] = 'error'
-            self.tasks[task_id]['error'] = str(e)
+            task.error = str(e)
+            task.status = 'error'
+        finally:
+            # Wake up anyone waiting on this task
+            task.done.set()
+            self._notify(task)
+    
+    def _set_progress(self, task, progress):
+        """Record task progress and push it to any subscribers."""
+        task.progress = progress
+        self._notify(task)
+    
+    def _notify(self, task):
+        """Push the current status of a task to its subscribers."""
+        status = self._status_of(task)
+        for queue in task.listeners:
+            queue.put_nowait(status)
+    
+    @staticmethod
+    def _status_of(task):
+        """Build the public status dict for a task."""
+        return {
+            'status': task.status,
+            'progress': task.progress,
+            'error': task.error
+        }
     
     def _create_mock_audio(self, task_id, description):
         """
@@ -91,59 +261,73 @@ class MusicGenerationService:
         
         For now, we'll create a simple WAV file with a tone.
         """
-        import wave
-        import struct
-        import math
-        
-        # Audio parameters
-        sample_rate = 44100
-        duration = 5.0  # 5 seconds
         frequency = 440.0  # A4 note
         
         # Adjust frequency based on description keywords
-        description_lower = description.lower()
-        if 'low' in description_lower or 'bass' in description_lower:
+        if _LOW_RE.search(description):
             frequency = 220.0  # A3
-        elif 'high' in description_lower or 'treble' in description_lower:
+        elif _HIGH_RE.search(description):
             frequency = 880.0  # A5
         
-        # Generate audio data
-        num_samples = int(sample_rate * duration)
-        audio_data = []
-        
-        for i in range(num_samples):
-            # Create a simple sine wave with some variation
-            t = float(i) / sample_rate
-            # Add some harmonics for richer sound
-            value = (
-                math.sin(2 * math.pi * frequency * t) * 0.3 +
-                math.sin(2 * math.pi * frequency * 2 * t) * 0.2 +
-                math.sin(2 * math.pi * frequency * 3 * t) * 0.1
-            )
-            # Apply envelope (fade in/out)
-            envelope = 1.0
-            if t < 0.1:
-                envelope = t / 0.1  # Fade in
-            elif t > duration - 0.1:
-                envelope = (duration - t) / 0.1  # Fade out
-            
-            value *= envelope
-            # Convert to 16-bit integer
-            audio_data.append(int(value * 32767))
-        
-        # Save as WAV file
         audio_path = os.path.join(self.audio_dir, f'{task_id}.wav')
         
-        with wave.open(audio_path, 'w') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(sample_rate)
-            
-            for sample in audio_data:
-                wav_file.writeframes(struct.pack('<h', sample))
+        # Identical parameters produce identical audio, so reuse earlier output
+        cache_key = (frequency, DURATION, SAMPLE_RATE)
+        if self._reuse_cached_audio(cache_key, audio_path):
+            return audio_path
+        
+        # Waveforms are normally precomputed at startup by load_waveforms()
+        samples = self._waveforms.get(frequency)
+        if samples is None:
+            samples = _synthesize_pcm(frequency)
+            self._waveforms[frequency] = samples
+        
+        # Save as WAV file (fixed header followed by the raw samples)
+        with open(audio_path, 'wb') as wav_file:
+            wav_file.write(_WAV_HEADER)
+            wav_file.write(samples)
+        
+        self._cache_audio(cache_key, audio_path)
         
         return audio_path
     
+    def _reuse_cached_audio(self, cache_key, audio_path):
+        """
+        Place a previously generated WAV at audio_path, if one is cached.
+        
+        The file is hard-linked (copied if linking is unsupported) so each
+        task keeps its own path and can be cleaned up independently.
+        
+        Returns:
+            bool: True on a cache hit, False if the audio must be generated
+        """
+        with self._audio_cache_lock:
+            cached_path = self.audio_cache.get(cache_key)
+            if cached_path is None:
+                return False
+            self.audio_cache.move_to_end(cache_key)
+        
+        try:
+            os.link(cached_path, audio_path)
+        except FileNotFoundError:
+            # The cached file was cleaned up; forget it and regenerate
+            with self._audio_cache_lock:
+                if self.audio_cache.get(cache_key) == cached_path:
+                    del self.audio_cache[cache_key]
+            return False
+        except OSError:
+            shutil.copyfile(cached_path, audio_path)
+        
+        return True
+    
+    def _cache_audio(self, cache_key, audio_path):
+        """Remember a generated WAV file, evicting the least recently used."""
+        with self._audio_cache_lock:
+            self.audio_cache[cache_key] = audio_path
+            self.audio_cache.move_to_end(cache_key)
+            while len(self.audio_cache) > AUDIO_CACHE_SIZE:
+                self.audio_cache.popitem(last=False)
+    
     def get_status(self, task_id):
         """
         Get the status of a generation task.
@@ -154,17 +338,75 @@ class MusicGenerationService:
         Returns:
             dict: Status information
         """
-        if task_id not in self.tasks:
+        task = self.tasks.get(task_id)
+        
+        if task is None:
             return {
                 'status': 'error',
                 'error': 'Task not found'
             }
         
-        return {
-            'status': self.tasks[task_id]['status'],
-            'progress': self.tasks[task_id]['progress'],
-            'error': self.tasks[task_id].get('error')
-        }
+        return self._status_of(task)
+    
+    def subscribe(self, task_id):
+        """
+        Subscribe to status updates for a generation task.
+        
+        The returned queue immediately receives the current status, then
+        a new status dict every time progress changes. The last item has
+        a status of 'completed' or 'error'.
+        
+        Args:
+            task_id: The task ID to follow
+            
+        Returns:
+            asyncio.Queue: Queue of status dicts, or None if not found
+        """
+        task = self.tasks.get(task_id)
+        
+        if task is None:
+            return None
+        
+        queue = asyncio.Queue()
+        queue.put_nowait(self._status_of(task))
+        task.listeners.append(queue)
+        return queue
+    
+    def unsubscribe(self, task_id, queue):
+        """
+        Stop receiving status updates for a generation task.
+        
+        Args:
+            task_id: The task ID passed to subscribe()
+            queue: The queue returned by subscribe()
+        """
+        task = self.tasks.get(task_id)
+        
+        if task is not None and queue in task.listeners:
+            task.listeners.remove(queue)
+    
+    async def wait_for(self, task_id, timeout):
+        """
+        Wait until a generation task finishes or the timeout expires.
+        
+        Args:
+            task_id: The task ID to wait on
+            timeout: Maximum number of seconds to wait
+            
+        Returns:
+            bool: True if the task finished (completed or error), False on timeout
+        """
+        task = self.tasks.get(task_id)
+        
+        if task is None:
+            return False
+        
+        try:
+            await asyncio.wait_for(task.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        
+        return True
     
     def get_audio_path(self, task_id):
         """
@@ -176,15 +418,12 @@ class MusicGenerationService:
         Returns:
             str: Path to audio file, or None if not ready/not found
         """
-        if task_id not in self.tasks:
-            return None
-        
-        task = self.tasks[task_id]
+        task = self.tasks.get(task_id)
         
-        if task['status'] != 'completed':
+        if task is None or task.status != 'completed':
             return None
         
-        audio_path = task.get('audio_path')
+        audio_path = task.audio_path
         
         if audio_path and os.path.exists(audio_path):
             return audio_path
@@ -195,23 +434,149 @@ class MusicGenerationService:
         """
         Clean up old tasks and their audio files.
         
+        The TTL shrinks as the number of tracked tasks grows: once above
+        TASK_PRESSURE_LOW it is halved, and above MAX_TASKS the oldest
+        finished tasks are evicted regardless of age. start_generation()
+        also enforces MAX_TASKS on every insert via _enforce_task_limit().
+        
         Args:
             max_age_hours: Maximum age in hours before cleanup
         """
         current_time = datetime.now()
         
+        # Snapshot under the lock so concurrent inserts can't break iteration
+        with self._lock:
+            snapshot = list(self.tasks.items())
+        
+        if self._task_pressure(len(snapshot)) > 0:
+            max_age_hours /= 2
+        
         tasks_to_remove = []
-        for task_id, task in self.tasks.items():
-            age = (current_time - task['created_at']).total_seconds() / 3600
+        remaining = []
+        for task_id, task in snapshot:
+            age = (current_time - task.created_at).total_seconds() / 3600
             if age > max_age_hours:
                 tasks_to_remove.append(task_id)
-                # Delete audio file if it exists
-                audio_path = task.get('audio_path')
-                if audio_path and os.path.exists(audio_path):
-                    try:
-                        os.remove(audio_path)
-                    except Exception:
-                        pass
-        
-        for task_id in tasks_to_remove:
-            del self.tasks[task_id]
+            else:
+                remaining.append((task_id, task))
+        
+        # Over the hard limit, evict the oldest finished tasks right away
+        excess = len(remaining) - MAX_TASKS
+        tasks_to_remove.extend(self._oldest_finished(remaining, excess))
+        
+        self._remove_tasks(tasks_to_remove)
+    
+    def _enforce_task_limit(self):
+        """Evict the oldest finished tasks while more than MAX_TASKS exist."""
+        with self._lock:
+            snapshot = list(self.tasks.items())
+        
+        self._remove_tasks(self._oldest_finished(snapshot, len(snapshot) - MAX_TASKS))
+    
+    @staticmethod
+    def _oldest_finished(items, count):
+        """
+        Pick up to count finished tasks, oldest first.
+        
+        Args:
+            items: (task_id, Task) pairs to choose from
+            count: Number of tasks wanted (nothing is picked if <= 0)
+            
+        Returns:
+            list: Task IDs
+        """
+        if count <= 0:
+            return []
+        
+        finished = [(task_id, task) for task_id, task in items if task.done.is_set()]
+        finished.sort(key=lambda item: item[1].created_at)
+        return [task_id for task_id, _ in finished[:count]]
+    
+    def _remove_tasks(self, task_ids):
+        """Forget the given tasks and delete their audio files."""
+        with self._lock:
+            removed = [self.tasks.pop(task_id, None) for task_id in task_ids]
+        
+        for task in removed:
+            # Delete audio file if it exists
+            audio_path = task.audio_path if task else None
+            if audio_path and os.path.exists(audio_path):
+                try:
+                    os.remove(audio_path)
+                except Exception:
+                    pass
+    
+    @staticmethod
+    def _task_pressure(task_count):
+        """
+        Memory pressure from the number of tracked tasks.
+        
+        Returns:
+            float: 0 at or below TASK_PRESSURE_LOW, rising to 1 at MAX_TASKS
+        """
+        return max(0, (task_count - TASK_PRESSURE_LOW) / (MAX_TASKS - TASK_PRESSURE_LOW))
+    
+    async def _run_cleanup(self, interval):
+        """Call cleanup_old_tasks every interval seconds until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            # File removal is blocking I/O, so keep it off the event loop
+            await loop.run_in_executor(self.pool, self.cleanup_old_tasks)
+    
+    def start_cleanup(self, interval=CLEANUP_INTERVAL):
+        """
+        Start periodic cleanup of old tasks on the running event loop.
+        
+        Args:
+            interval: Seconds between cleanups
+        """
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._run_cleanup(interval))
+    
+    async def load_waveforms(self):
+        """
+        Synthesize every tone in parallel on the worker pool.
+        
+        Call once at startup so generation never waits on synthesis.
+        """
+        loop = asyncio.get_running_loop()
+        frequencies = [f for f in FREQUENCIES if f not in self._waveforms]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self.pool, _synthesize_pcm, frequency)
+            for frequency in frequencies
+        ))
+        self._waveforms.update(zip(frequencies, results))
+    
+    async def warmup(self):
+        """
+        Run one throwaway generation so the first real request does not pay
+        cold-start costs (pool thread start-up, first file creation).
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.pool, self._warmup)
+    
+    def _warmup(self):
+        audio_path = self._create_mock_audio('warmup', 'warmup warmup')
+        
+        # Don't let later requests link to the file we're about to delete
+        with self._audio_cache_lock:
+            for cache_key, cached_path in list(self.audio_cache.items()):
+                if cached_path == audio_path:
+                    del self.audio_cache[cache_key]
+        
+        try:
+            os.remove(audio_path)
+        except OSError:
+            pass
+    
+    def stop_cleanup(self):
+        """Stop periodic cleanup started by start_cleanup()."""
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
+    
+    def shutdown(self):
+        """Stop background cleanup and release the worker pool."""
+        self.stop_cleanup()
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,160 @@
+/**
+ * API-based music generator implementation
+ * 
+ * Generates music by calling the backend API.
+ * This wraps the existing server-side generation.
+ */
+class ApiMusicGenerator extends MusicGenerator {
+    constructor(apiEndpoint = '/api/generate-music', wsEndpoint = '/ws/generate') {
+        super();
+        this.apiEndpoint = apiEndpoint;
+        this.wsEndpoint = wsEndpoint;
+    }
+    
+    getName() {
+        return 'API Generator';
+    }
+    
+    async isAvailable() {
+        // API is always available (will fail gracefully if server is down)
+        return true;
+    }
+    
+    async generate(description, onProgress) {
+        if ('WebSocket' in window) {
+            try {
+                return await this.generateOverWebSocket(description, onProgress);
+            } catch (error) {
+                // The socket never got going (e.g. a proxy that drops the
+                // Upgrade header), so fall through to the plain HTTP API
+                if (!error.connectionFailed) {
+                    throw new Error(`API generation failed: ${error.message}`);
+                }
+            }
+        }
+        
+        try {
+            if (onProgress) onProgress(10);
+            
+            // Call the API
+            const response = await fetch(this.apiEndpoint, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ description: description }),
+            });
+            
+            if (!response.ok) {
+                const errorData = await response.json().catch(() => ({}));
+                throw new Error(errorData.error || `Server error: ${response.status}`);
+            }
+            
+            if (onProgress) onProgress(50);
+            
+            const data = await response.json();
+            
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            
+            if (onProgress) onProgress(90);
+            
+            // Return the audio URL
+            if (data.audio_url) {
+                if (onProgress) onProgress(100);
+                return data.audio_url;
+            } else {
+                throw new Error('No audio URL received from server');
+            }
+            
+        } catch (error) {
+            throw new Error(`API generation failed: ${error.message}`);
+        }
+    }
+    
+    /**
+     * Generate over a WebSocket, receiving live progress and the audio
+     * itself as binary frames. Resolves with a blob URL for the WAV.
+     * 
+     * If the connection fails before the server sends anything, the
+     * rejection error has `connectionFailed` set so callers can fall back.
+     */
+    generateOverWebSocket(description, onProgress) {
+        return new Promise((resolve, reject) => {
+            const connectionError = (message) => {
+                const error = new Error(message);
+                error.connectionFailed = true;
+                return error;
+            };
+            
+            const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+            let socket;
+            try {
+                socket = new WebSocket(`${protocol}//${window.location.host}${this.wsEndpoint}`);
+            } catch (error) {
+                reject(connectionError(error.message));
+                return;
+            }
+            socket.binaryType = 'arraybuffer';
+            
+            const chunks = [];
+            let expectedBytes = null;
+            let receivedBytes = 0;
+            let receivedMessage = false;
+            let finished = false;
+            
+            const finish = (callback, value) => {
+                finished = true;
+                socket.close();
+                callback(value);
+            };
+            
+            socket.onopen = () => {
+                socket.send(JSON.stringify({ description: description }));
+            };
+            
+            socket.onmessage = (event) => {
+                receivedMessage = true;
+                
+                if (typeof event.data === 'string') {
+                    const message = JSON.parse(event.data);
+                    
+                    if (message.status === 'error') {
+                        finish(reject, new Error(message.error || 'Music generation failed'));
+                        return;
+                    }
+                    
+                    if (onProgress) onProgress(message.progress);
+                    
+                    if (message.status === 'completed') {
+                        expectedBytes = message.audio_bytes;
+                    }
+                    return;
+                }
+                
+                chunks.push(event.data);
+                receivedBytes += event.data.byteLength;
+                
+                if (expectedBytes !== null && receivedBytes >= expectedBytes) {
+                    const blob = new Blob(chunks, { type: 'audio/wav' });
+                    finish(resolve, URL.createObjectURL(blob));
+                }
+            };
+            
+            socket.onerror = () => {
+                if (finished) return;
+                finish(reject, receivedMessage
+                    ? new Error('WebSocket connection failed')
+                    : connectionError('WebSocket connection failed'));
+            };
+            
+            socket.onclose = () => {
+                if (finished) return;
+                finish(reject, receivedMessage
+                    ? new Error('Connection closed before audio was received')
+                    : connectionError('WebSocket connection closed before any response'));
+            };
+        });
+    }
+}
@@ -181,10 +181,24 @@ async function generateMusic(description) {
 }
 
 // Audio handling
+
+/**
+ * Revoke the current audio URL if it is a blob: URL we created,
+ * so replaced audio doesn't stay in memory until the page reloads
+ */
+function releaseCurrentAudioUrl() {
+    if (currentAudioUrl && currentAudioUrl.startsWith('blob:')) {
+        URL.revokeObjectURL(currentAudioUrl);
+    }
+    currentAudioUrl = null;
+}
+
 function loadAudio(audioUrl) {
     setLoadingState(false);
     
-    // Set audio source
+    // Set audio source, releasing the previous one
+    releaseCurrentAudioUrl();
+    currentAudioUrl = audioUrl;
     audioElement.src = audioUrl;
     
     // Reset audio state
@@ -211,7 +225,9 @@ async function loadAudioFromBuffer(audioBuffer) {
         const blob = new Blob([wav], { type: 'audio/wav' });
         const url = URL.createObjectURL(blob);
         
-        // Set audio source
+        // Set audio source, releasing the previous one
+        releaseCurrentAudioUrl();
+        currentAudioUrl = url;
         audioElement.src = url;
         
         // Reset audio state